@@ -1,6 +1,31 @@
 import lib
 
 
+def search(conn):
+    yn = input('查詢全部電影嗎？(y/n): ').lower()
+    if yn == 'y':
+        movies = lib.search_movies(conn)
+        lib.list_rpt(movies)
+    else:
+        title = input('請輸入電影名稱: ').strip()
+        movies = lib.search_movies(conn, title)
+        lib.list_rpt(movies)
+
+
+def invalid(conn):
+    print('無效的選項，請重新輸入。')
+
+
+ACTIONS = {
+    '1': lib.import_movies,
+    '2': search,
+    '3': lib.add_movie,
+    '4': lib.modify_movie,
+    '5': lib.delete_movies,
+    '6': lib.export_movies,
+}
+
+
 def main():
     conn = lib.connect_db()
     lib.create_table(conn)
@@ -17,31 +42,11 @@ def main():
         print('------------------------')
         choice = input('請選擇操作選項 (1-7): ').strip()
 
-        if choice == '1':
-            lib.import_movies(conn)
-        elif choice == '2':
-            yn = input('查詢全部電影嗎？(y/n): ').lower()
-            if yn == 'y':
-                movies = lib.search_movies(conn)
-                lib.list_rpt(movies)
-            else:
-                title = input('請輸入電影名稱: ').strip()
-                movies = lib.search_movies(conn, title)
-                lib.list_rpt(movies)
-        elif choice == '3':
-            lib.add_movie(conn)
-        elif choice == '4':
-            lib.modify_movie(conn)
-        elif choice == '5':
-            lib.delete_movies(conn)
-        elif choice == '6':
-            lib.export_movies(conn)
-        elif choice == '7':
+        if choice == '7':
             print('系統已退出。')
             conn.close()
             break
-        else:
-            print('無效的選項，請重新輸入。')
+        ACTIONS.get(choice, invalid)(conn)
 
 
 if __name__ == '__main__':
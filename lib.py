@@ -1,24 +1,81 @@
 import os
+import sys
 import sqlite3
 import json
-from typing import List, Dict, Union
+from typing import Iterator, List, Dict, Union
 import unicodedata
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain
+from pathlib import Path
+
+try:
+    import ijson  # 選用：串流解析大型 JSON 檔
+except ImportError:
+    ijson = None
+
+try:
+    import orjson  # 選用：以 C 實作、速度較快的 JSON 編解碼
+except ImportError:
+    orjson = None
 
 DB_PATH = 'movies.db'
 JSON_IN_PATH = 'movies.json'
 JSON_OUT_PATH = 'exported.json'
 
+# 常用 SQL 敘述，固定字串可讓 sqlite3 的敘述快取重複使用已編譯的計畫
+_INSERT_SQL = ('INSERT INTO movies (title, director, genre, year, rating) '
+               'VALUES (?, ?, ?, ?, ?)')
+# 只略過違反唯一索引的資料；OR IGNORE 會連 CHECK、NOT NULL 錯誤也一併略過
+_INSERT_SKIP_DUP_SQL = ('INSERT INTO movies (title, director, genre, year, rating) '
+                        'VALUES (?, ?, ?, ?, ?) ON CONFLICT DO NOTHING')
+_UPDATE_BY_ID_SQL = 'UPDATE movies SET {} WHERE id = ?'
+_DELETE_BY_IDS_SQL = 'DELETE FROM movies WHERE id IN ({})'
+_MAX_SQL_PARAMS = 999  # 舊版 SQLite 單一敘述可綁定的參數上限
+
+# 電影名稱全文索引（trigram 分詞支援任意子字串比對，查詢字串需至少 3 個字元）
+_FTS_MIN_QUERY_LEN = 3
+_fts_enabled = False
+
+_JSON_ERRORS = (json.JSONDecodeError, ijson.JSONError) if ijson else (json.JSONDecodeError,)
+_json_loads = orjson.loads if orjson else json.loads
+_json_encode = json.JSONEncoder(ensure_ascii=False, indent=4).encode
+
 
 def connect_db() -> sqlite3.Connection:
     """連接到 SQLite 資料庫，若不存在則自動建立。"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, cached_statements=256)
+    # WAL 模式搭配 NORMAL 同步，減少每次提交時的磁碟同步成本
+    conn.executescript('''
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-20000;
+        PRAGMA busy_timeout=5000;
+        PRAGMA foreign_keys=ON;
+    ''')
     conn.row_factory = sqlite3.Row  # 查詢結果以字典形式返回
+    conn.isolation_level = None  # 自行控制交易，不讓 sqlite3 隱式開啟 DEFERRED 交易
     return conn
 
 
+@contextmanager
+def _write_txn(conn: sqlite3.Connection) -> Iterator[None]:
+    """以 BEGIN IMMEDIATE 開啟寫入交易，成功時提交，發生例外時回滾。"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+        conn.execute('COMMIT')
+    except BaseException:
+        # 部分錯誤（如 SQLITE_FULL、SQLITE_IOERR）發生時 SQLite 已自動回滾
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+
+
 def create_table(conn: sqlite3.Connection) -> None:
     """建立 movies 資料表（若不存在）。"""
-    with conn:
+    with _write_txn(conn):
         conn.execute('''
             CREATE TABLE IF NOT EXISTS movies (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -29,23 +86,99 @@ def create_table(conn: sqlite3.Connection) -> None:
                 rating REAL CHECK (rating >= 1.0 AND rating <= 10.0)
             )
         ''')
+        # NOCASE 定序與 LIKE 預設不分大小寫一致，前綴比對才能使用此索引
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_movies_title ON movies (title COLLATE NOCASE)')
+    try:
+        # 同名、同導演、同年份視為同一部電影，重複匯入時由索引略過
+        with _write_txn(conn):
+            conn.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_movies_key
+                ON movies (title, director, year)
+            ''')
+    except sqlite3.IntegrityError:
+        print('資料表中已有重複的電影，未建立唯一索引')
+    create_fts(conn)
+
+
+def create_fts(conn: sqlite3.Connection) -> None:
+    """建立電影名稱的 FTS5 全文索引及同步觸發器，不支援 FTS5 時改用 LIKE 查詢。"""
+    global _fts_enabled
+    try:
+        with _write_txn(conn):
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'movies_fts'").fetchone()
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+                    title, content='movies', content_rowid='id', tokenize='trigram'
+                )
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS movies_fts_ai AFTER INSERT ON movies BEGIN
+                    INSERT INTO movies_fts (rowid, title) VALUES (new.id, new.title);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS movies_fts_ad AFTER DELETE ON movies BEGIN
+                    INSERT INTO movies_fts (movies_fts, rowid, title)
+                    VALUES ('delete', old.id, old.title);
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS movies_fts_au AFTER UPDATE OF title ON movies BEGIN
+                    INSERT INTO movies_fts (movies_fts, rowid, title)
+                    VALUES ('delete', old.id, old.title);
+                    INSERT INTO movies_fts (rowid, title) VALUES (new.id, new.title);
+                END
+            ''')
+            if not exists:
+                # 既有資料庫第一次建立索引時，補上已存在的資料
+                conn.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
+        _fts_enabled = True
+    except sqlite3.OperationalError:
+        _fts_enabled = False
+
+
+@lru_cache(maxsize=4096)
+def _char_width(ch: str) -> int:
+    """計算單一字元的顯示寬度，全形字符為2，半形字符為1。"""
+    return 2 if unicodedata.east_asian_width(ch) in ('F', 'W', 'A') else 1
+
 
+# 只涵蓋 BMP，BMP 以外的字元較少見，改查 _char_width
+_BMP_SIZE = 0x10000
 
+
+@lru_cache(maxsize=None)
+def _wide_bitmap() -> bytes:
+    """建立 BMP 範圍內全形字符的位元圖（8 KB，每個碼位佔 1 bit），首次使用時才建立。"""
+    bitmap = bytearray(_BMP_SIZE >> 3)
+    for cp in range(_BMP_SIZE):
+        if unicodedata.east_asian_width(chr(cp)) in ('F', 'W', 'A'):
+            bitmap[cp >> 3] |= 1 << (cp & 7)
+    return bytes(bitmap)
+
+
+@lru_cache(maxsize=4096)
 def get_display_width(s: str) -> int:
     """計算字串在終端機顯示時的寬度。"""
+    bitmap = _wide_bitmap()
     width = 0
     for ch in s:
-        if unicodedata.east_asian_width(ch) in ('F', 'W', 'A'):
-            width += 2  # 全形字符寬度為2
+        cp = ord(ch)
+        if cp < _BMP_SIZE:
+            width += 1 + (bitmap[cp >> 3] >> (cp & 7) & 1)
         else:
-            width += 1  # 半形字符寬度為1
+            width += _char_width(ch)
     return width
 
 
 def pad_string(s: str, total_width: int) -> str:
     """根據顯示寬度來填充字串，使其達到指定的總寬度。"""
+    if s.isascii():
+        return s.ljust(total_width)  # 純 ASCII 字元寬度皆為1
     padding = total_width - get_display_width(s)
-    return s + ' ' * max(padding, 0)
+    return f"{s}{' ' * max(padding, 0)}"
 
 
 def list_rpt(movies: List[sqlite3.Row]) -> None:
@@ -53,38 +186,48 @@ def list_rpt(movies: List[sqlite3.Row]) -> None:
     if not movies:
         print('查無資料')
         return
-    print()
     headers = ['電影名稱', '導演', '類型', '上映年份', '評分']
     widths = [20, 24, 12, 10, 6]  # 設定每個欄位的顯示寬度
     header_line = ''.join(pad_string(h, w) for h, w in zip(headers, widths))
-    print(header_line)
-    print('-' * sum(widths))
+    lines = ['', header_line, '-' * sum(widths)]
+    row_fmt = ''.join(f'{{:<{w}}}' for w in widths)  # 純 ASCII 資料列共用的格式字串
     for movie in movies:
-        row = [
-            pad_string(movie['title'], widths[0]),
-            pad_string(movie['director'], widths[1]),
-            pad_string(movie['genre'], widths[2]),
-            pad_string(str(movie['year']), widths[3]),
-            pad_string(str(movie['rating']), widths[4])
-        ]
-        print(''.join(row))
+        title, director, genre = movie['title'], movie['director'], movie['genre']
+        year, rating = str(movie['year']), str(movie['rating'])
+        if title.isascii() and director.isascii() and genre.isascii():
+            lines.append(row_fmt.format(title, director, genre, year, rating))
+        else:
+            lines.append(f'{pad_string(title, widths[0])}{pad_string(director, widths[1])}'
+                         f'{pad_string(genre, widths[2])}{pad_string(year, widths[3])}'
+                         f'{pad_string(rating, widths[4])}')
+    # 組成完整報表後一次寫出，避免每列各呼叫一次 print
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 
 def import_movies(conn: sqlite3.Connection) -> None:
     """從 movies.json 匯入電影資料到資料庫。"""
     try:
-        with open(JSON_IN_PATH, 'r', encoding='utf-8') as f:
-            movies = json.load(f)
-        with conn:
-            conn.executemany('''
-                INSERT INTO movies (title, director, genre, year, rating)
-                VALUES (?, ?, ?, ?, ?)
-            ''', [(movie['title'], movie['director'], movie['genre'],
-                   movie['year'], movie['rating']) for movie in movies])
+        with Path(JSON_IN_PATH).open('rb') as f:
+            if ijson:
+                # 最上層不是陣列時 items() 不會產生任何資料，須先確認
+                _, event, _ = next(ijson.parse(f))
+                if event != 'start_array':
+                    raise ijson.JSONError('最上層必須是陣列')
+                f.seek(0)
+                # 逐筆解析，邊讀邊寫入，不需將整個檔案載入記憶體
+                movies = ijson.items(f, 'item', use_float=True)
+            else:
+                # 直接解析位元組，省去文字解碼層
+                movies = _json_loads(f.read())
+            rows = ((movie['title'], movie['director'], movie['genre'],
+                     movie['year'], movie['rating']) for movie in movies)
+            # 以單一寫入交易包住整批匯入，避免逐筆提交
+            with _write_txn(conn):
+                conn.executemany(_INSERT_SKIP_DUP_SQL, rows)
         print('電影已匯入')
     except FileNotFoundError:
         print('找不到檔案...')
-    except json.JSONDecodeError:
+    except _JSON_ERRORS:
         print('JSON 解析錯誤')
     except sqlite3.DatabaseError as e:
         print(f"資料庫操作發生錯誤: {e}")
@@ -92,17 +235,42 @@ def import_movies(conn: sqlite3.Connection) -> None:
         print(f'發生其它錯誤 {e}')
 
 
+def _use_fts(title: str) -> bool:
+    """判斷查詢字串能否使用全文索引；過短或含 LIKE 萬用字元時改用 LIKE。"""
+    return (_fts_enabled and len(title) >= _FTS_MIN_QUERY_LEN
+            and '%' not in title and '_' not in title)
+
+
+def search_movies_iter(conn: sqlite3.Connection, title: str = '') -> Iterator[sqlite3.Row]:
+    """查詢電影並逐筆回傳結果，不會一次載入全部資料。"""
+    if title and _use_fts(title):
+        # 以雙引號包成片語，避免使用者輸入被當成 FTS 查詢語法
+        phrase = '"' + title.replace('"', '""') + '"'
+        return conn.execute('''
+            SELECT m.* FROM movies_fts
+            JOIN movies m ON m.id = movies_fts.rowid
+            WHERE movies_fts MATCH ?
+            ORDER BY m.id
+        ''', (phrase,))
+    if title and not _fts_enabled:
+        # 無 FTS5 時先以前綴比對走 title 索引，查無資料再退回全表掃描的包含比對
+        cursor = conn.execute(
+            "SELECT * FROM movies WHERE title LIKE ? ORDER BY id", (f'{title}%',))
+        first = cursor.fetchone()
+        if first is not None:
+            return chain((first,), cursor)
+    if title:
+        # 無法使用全文索引（字串過短或含萬用字元）或前綴比對查無資料時的包含比對
+        return conn.execute(
+            "SELECT * FROM movies WHERE title LIKE ? ORDER BY id", (f'%{title}%',))
+    return conn.execute("SELECT * FROM movies")
+
+
 def search_movies(conn: sqlite3.Connection, title: str = '') -> List[sqlite3.Row]:
     """查詢電影，可選擇依電影名稱過濾。"""
     try:
-        with conn:
-            if title:
-                cursor = conn.execute(
-                    "SELECT * FROM movies WHERE title LIKE ?", (f'%{title}%',))
-            else:
-                cursor = conn.execute("SELECT * FROM movies")
-            movies = cursor.fetchall()
-            return movies
+        movies = list(search_movies_iter(conn, title))
+        return movies
     except sqlite3.DatabaseError as e:
         print(f"資料庫操作發生錯誤: {e}")
         return []
@@ -122,11 +290,8 @@ def add_movie(conn: sqlite3.Connection) -> None:
         if not (1.0 <= rating <= 10.0):
             print('評分需在 1.0 到 10.0 之間')
             return
-        with conn:
-            conn.execute('''
-                INSERT INTO movies (title, director, genre, year, rating)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (title, director, genre, year, rating))
+        with _write_txn(conn):
+            conn.execute(_INSERT_SQL, (title, director, genre, year, rating))
         print('電影已新增')
     except ValueError:
         print('年份或評分格式錯誤')
@@ -177,10 +342,8 @@ def modify_movie(conn: sqlite3.Connection) -> None:
         set_clause = ', '.join(f"{k} = ?" for k in update_fields.keys())
         params = list(update_fields.values()) + [movie['id']]
         try:
-            with conn:
-                conn.execute(f'''
-                    UPDATE movies SET {set_clause} WHERE id = ?
-                ''', params)
+            with _write_txn(conn):
+                conn.execute(_UPDATE_BY_ID_SQL.format(set_clause), params)
             print('資料已修改')
         except sqlite3.DatabaseError as e:
             print(f"資料庫操作發生錯誤: {e}")
@@ -197,7 +360,7 @@ def delete_movies(conn: sqlite3.Connection) -> None:
         confirm = input('確定要刪除全部電影嗎？(y/n): ').lower()
         if confirm == 'y':
             try:
-                with conn:
+                with _write_txn(conn):
                     conn.execute('DELETE FROM movies')
                 print('全部電影已刪除')
             except sqlite3.DatabaseError as e:
@@ -217,9 +380,12 @@ def delete_movies(conn: sqlite3.Connection) -> None:
         if confirm == 'y':
             try:
                 ids_to_delete = [movie['id'] for movie in movies]
-                with conn:
-                    conn.executemany(
-                        'DELETE FROM movies WHERE id = ?', [(id_,) for id_ in ids_to_delete])
+                with _write_txn(conn):
+                    # 以 IN (...) 一次刪除多筆，超過參數上限時分批執行
+                    for i in range(0, len(ids_to_delete), _MAX_SQL_PARAMS):
+                        chunk = ids_to_delete[i:i + _MAX_SQL_PARAMS]
+                        conn.execute(
+                            _DELETE_BY_IDS_SQL.format(','.join('?' * len(chunk))), chunk)
                 print('電影已刪除')
             except sqlite3.DatabaseError as e:
                 print(f"資料庫操作發生錯誤: {e}")
@@ -229,21 +395,41 @@ def delete_movies(conn: sqlite3.Connection) -> None:
             print('取消刪除')
 
 
+def _dump_row(movie: Dict[str, Union[int, float, str]]) -> bytes:
+    """將單筆電影資料編碼為匯出檔中縮排 4 格的 JSON 物件。"""
+    if orjson:
+        # orjson 只支援 2 格縮排；資料列為單層字典，直接放大各行縮排即可
+        data = orjson.dumps(movie, option=orjson.OPT_INDENT_2)
+        return b'    ' + data.replace(b'\n  ', b'\n        ').replace(b'\n}', b'\n    }')
+    return ('    ' + _json_encode(movie).replace('\n', '\n    ')).encode('utf-8')
+
+
 def export_movies(conn: sqlite3.Connection) -> None:
     """將電影資料匯出至 exported.json。"""
     all_export = input('匯出全部電影嗎？(y/n): ').lower()
-    if all_export == 'y':
-        movies = search_movies(conn)
-    else:
+    title = ''
+    if all_export != 'y':
         title = input('請輸入要匯出的電影名稱: ').strip()
-        movies = search_movies(conn, title)
-    if not movies:
+    try:
+        # 直接走訪游標，邊讀取邊寫出，不先把所有資料載入記憶體
+        movies = search_movies_iter(conn, title)
+        first = next(movies, None)
+    except sqlite3.DatabaseError as e:
+        print(f"資料庫操作發生錯誤: {e}")
+        return
+    if first is None:
         print('查無資料')
         return
-    movies_list = [dict(movie) for movie in movies]
+    movies = chain((first,), movies)
     try:
-        with open(JSON_OUT_PATH, 'w', encoding='utf-8') as f:
-            json.dump(movies_list, f, ensure_ascii=False, indent=4)
+        with Path(JSON_OUT_PATH).open('wb') as f:
+            # 逐筆序列化寫出，輸出格式與 json.dump(..., indent=4) 相同
+            f.write(b'[\n')
+            for i, movie in enumerate(movies):
+                if i:
+                    f.write(b',\n')
+                f.write(_dump_row(dict(movie)))
+            f.write(b'\n]')
         print(f'電影資料已匯出至 {JSON_OUT_PATH}')
     except Exception as e:
         print(f'發生錯誤: {e}')